@@ -9,14 +9,15 @@ from sentence_transformers import SentenceTransformer
 load_dotenv()
 
 class DocumentProcessor:
-    def __init__(self):
-        # Initialize local vector store
+    def __init__(self, vector_store=None):
+        # Use the shared vector store when given one so ingested
+        # documents are visible to the query side
         print("Initializing local vector store...")
-        self.vector_store = LocalVectorStore()
+        self.vector_store = vector_store if vector_store is not None else LocalVectorStore()
         print("Vector store ready!")
 
         print("Loading SentenceTransformer model...")
-        self.embedding_model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
+        self.embedding_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
         print("Embedding model loaded.")
         
         # Initialize text splitter
@@ -26,17 +27,22 @@ class DocumentProcessor:
             length_function=len,
         )
     
-    def process_text_file(self, file_path, document_id):
-        """Process a text file and add to vector database"""
+    def embed_batch(self, chunks, batch_size=64):
+        """Embed a list of chunks in a single batched forward pass"""
+        return self.embedding_model.encode(
+            chunks,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+
+    def process_text(self, text, document_id, source=None):
+        """Process an in-memory text and add to vector database"""
         try:
-            # Read the file
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-            
             # Split into chunks
-            chunks = self.text_splitter.split_text(content)
+            chunks = self.text_splitter.split_text(text)
             print(f"Split document into {len(chunks)} chunks")
-            
+
             # Prepare data for vector store
             texts = chunks
             metadatas = []
@@ -45,9 +51,9 @@ class DocumentProcessor:
                     "text": chunk,
                     "document_id": document_id,
                     "chunk_index": i,
-                    "source": file_path
+                    "source": source or document_id
                 })
-            
+
             # Embed each chunk
             embeddings = self.embedding_model.encode(texts)
 
@@ -58,13 +64,25 @@ class DocumentProcessor:
                 print(f"Error adding documents to vector store: {str(e)}")
                 return False
 
-            print(f"Successfully processed {file_path}")
+            print(f"Successfully processed {document_id}")
             return True
-            
+
+        except Exception as e:
+            print(f"Error processing {document_id}: {str(e)}")
+            return False
+
+    def process_text_file(self, file_path, document_id):
+        """Process a text file and add to vector database"""
+        try:
+            # Read the file
+            with open(file_path, 'r', encoding='utf-8') as file:
+                content = file.read()
         except Exception as e:
             print(f"Error processing {file_path}: {str(e)}")
             return False
 
+        return self.process_text(content, document_id, source=file_path)
+
     def detect_file_type(self, file_path):
         """Detect file type using multiple methods"""
         # Try MIME type detection
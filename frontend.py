@@ -1,13 +1,35 @@
 import streamlit as st
-from query_engine import QueryEngine
+from query_engine import QueryEngine, NO_CONFIDENT_ANSWER
 from document_processor import DocumentProcessor
+from local_vector_store import LocalVectorStore
+from frontend_cache import SemanticQueryCache
 import os
+import hashlib
+import sqlite3
 import tempfile
+import time
 from pathlib import Path
 import docx
 import PyPDF2
 import pandas as pd
-from io import StringIO
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pa_compute
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_compute = pa_csv = None
+from io import StringIO, BytesIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+FILE_TYPE_ICONS = {
+    ".pdf": "📑", ".txt": "📄", ".docx": "📝", ".csv": "📊"
+}
 
 # Set page config
 st.set_page_config(
@@ -16,144 +38,370 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def get_vector_store():
+    """Load the vector store once per Streamlit process.
+
+    Both the query engine and the document processor must use this
+    instance; with separate stores, ingested documents would only be
+    searchable after a process restart.
+    """
+    return LocalVectorStore()
+
+@st.cache_resource
+def get_query_engine():
+    """Load the query engine once per Streamlit process, shared by all sessions"""
+    return QueryEngine(vector_store=get_vector_store())
+
+@st.cache_resource
+def get_doc_processor():
+    """Load the document processor once per Streamlit process, shared by all sessions"""
+    return DocumentProcessor(vector_store=get_vector_store())
+
+CACHE_DB = "processed.db"
+
+@st.cache_resource
+def _cache_db():
+    """Connection to the on-disk cache keyed by content hash"""
+    conn = sqlite3.connect(CACHE_DB, check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS extracted (hash TEXT PRIMARY KEY, text TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS processed (hash TEXT PRIMARY KEY, name TEXT, ts REAL)"
+    )
+    conn.commit()
+    return conn
+
+def _cached_extraction(content_hash):
+    """Return previously extracted text for this content hash, or None"""
+    row = _cache_db().execute(
+        "SELECT text FROM extracted WHERE hash=?", (content_hash,)
+    ).fetchone()
+    return row[0] if row else None
+
+def _store_extraction(content_hash, text):
+    """Persist extracted text so re-uploads of the same bytes skip extraction"""
+    conn = _cache_db()
+    conn.execute(
+        "INSERT OR REPLACE INTO extracted (hash, text) VALUES (?, ?)",
+        (content_hash, text)
+    )
+    conn.commit()
+
+def _is_processed(content_hash):
+    """True if a file with these bytes was already ingested"""
+    return _cache_db().execute(
+        "SELECT 1 FROM processed WHERE hash=?", (content_hash,)
+    ).fetchone() is not None
+
+def _mark_processed(content_hash, name):
+    """Record that a file with these bytes made it into the vector store"""
+    conn = _cache_db()
+    conn.execute(
+        "INSERT OR REPLACE INTO processed (hash, name, ts) VALUES (?, ?, ?)",
+        (content_hash, name, time.time())
+    )
+    conn.commit()
+
+def _clear_processed_marks():
+    """Forget ingested-file hashes (after the vector store is cleared)"""
+    conn = _cache_db()
+    conn.execute("DELETE FROM processed")
+    conn.commit()
+
+@st.cache_data
+def _stats_snapshot(version):
+    """Vector store stats, keyed on a counter bumped by ingests/clears.
+
+    Reruns of the stats view hit the cache instead of the store until
+    the corpus actually changes.
+    """
+    return get_vector_store().get_stats()
+
+@st.cache_data
+def _uploads_snapshot(mtime):
+    """Scan the uploads directory, keyed on its mtime.
+
+    The cached entry is only invalidated when the directory actually
+    changes, so Streamlit reruns skip the scan entirely. scandir yields
+    each entry's name and stat in one pass, so getting sizes doesn't
+    cost a second stat syscall per file.
+    """
+    with os.scandir("uploads") as entries:
+        return sorted((entry.name, entry.stat().st_size) for entry in entries)
+
+def list_uploads():
+    """Return the cached list of (name, size) entries in uploads/"""
+    if not os.path.exists("uploads"):
+        return []
+    return _uploads_snapshot(os.path.getmtime("uploads"))
+
 # Enhanced document management
 def show_document_manager():
     st.subheader("📋 Document Database")
-    
+
     # Show uploaded documents
     if os.path.exists("uploads"):
-        uploaded_files = os.listdir("uploads")
+        uploaded_files = list_uploads()
         if uploaded_files:
             st.write("**Uploaded Documents:**")
-            for file in uploaded_files:
+            for name, size in uploaded_files:
                 col1, col2 = st.columns([3, 1])
                 with col1:
-                    st.write(f"📄 {file}")
+                    st.write(f"📄 {name} ({size} bytes)")
                 with col2:
-                    if st.button(f"🗑️", key=f"delete_{file}"):
-                        os.remove(f"uploads/{file}")
-                        st.success(f"Deleted {file}")
+                    if st.button(f"🗑️", key=f"delete_{name}"):
+                        os.remove(f"uploads/{name}")
+                        st.success(f"Deleted {name}")
                         st.experimental_rerun()
 
 def extract_text_from_docx(file):
     """Extract text from DOCX file"""
-    try:
-        doc = docx.Document(file)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
-    except Exception as e:
-        st.error(f"Error reading DOCX file: {str(e)}")
-        return None
+    doc = docx.Document(file)
+    # Single join is linear time; += concatenation is quadratic
+    return "\n".join(paragraph.text for paragraph in doc.paragraphs)
 
 def extract_text_from_pdf(file):
     """Extract text from PDF file"""
-    try:
-        pdf_reader = PyPDF2.PdfReader(file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        st.error(f"Error reading PDF file: {str(e)}")
-        return None
+    # Read the upload once so we don't seek back and forth on the
+    # Streamlit UploadedFile wrapper
+    data = file.read()
+
+    if pdfium is not None:
+        # pypdfium2 (native PDFium) extracts text much faster than PyPDF2
+        pdf = pdfium.PdfDocument(data)
+        return "\n".join(
+            pdf[i].get_textpage().get_text_range() for i in range(len(pdf))
+        )
+
+    # Fall back to PyPDF2 if pypdfium2 is not installed
+    pdf_reader = PyPDF2.PdfReader(BytesIO(data))
+    return "\n".join(page.extract_text() or "" for page in pdf_reader.pages)
+
+def _csv_text_from_arrow(table, name):
+    """Format the CSV summary text directly from a pyarrow Table"""
+    text = f"CSV Data from {name}:\n\n"
+    text += f"Columns: {', '.join(table.column_names)}\n\n"
+    text += f"Total rows: {table.num_rows}\n\n"
 
-def extract_text_from_csv(file):
+    # to_csv goes through pandas' native C writer, which is far faster
+    # than to_string's object-dtype formatter on wide frames
+    text += "Sample data:\n"
+    text += table.slice(0, 10).to_pandas().to_csv(index=False)
+
+    # Summary statistics via pyarrow compute kernels, avoiding a full
+    # to_pandas conversion and describe()
+    numeric_cols = [
+        field.name for field in table.schema
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+    ]
+    if numeric_cols:
+        text += "\nSummary Statistics:\n"
+        for col_name in numeric_cols:
+            col = table.column(col_name)
+            min_max = pa_compute.min_max(col).as_py()
+            mean = pa_compute.mean(col).as_py()
+            std = pa_compute.stddev(col).as_py()
+            count = table.num_rows - col.null_count
+            text += (
+                f"{col_name}: count={count}, mean={mean}, std={std}, "
+                f"min={min_max['min']}, max={min_max['max']}\n"
+            )
+
+    return text
+
+def extract_text_from_csv(file, name=None):
     """Extract text from CSV file"""
-    try:
-        # Read CSV
-        df = pd.read_csv(file)
-        
-        # Convert to text format
-        text = f"CSV Data from {file.name}:\n\n"
-        text += f"Columns: {', '.join(df.columns)}\n\n"
-        text += f"Total rows: {len(df)}\n\n"
-        
-        # Add first few rows as context
-        text += "Sample data:\n"
-        text += df.head(10).to_string(index=False)
-        
-        # Add summary statistics if numeric columns exist
-        numeric_cols = df.select_dtypes(include=['number']).columns
-        if len(numeric_cols) > 0:
-            text += "\n\nSummary Statistics:\n"
-            text += df[numeric_cols].describe().to_string()
-        
-        return text
-    except Exception as e:
-        st.error(f"Error reading CSV file: {str(e)}")
-        return None
+    name = name or file.name
 
-def process_uploaded_file(uploaded_file, doc_processor):
-    """Process an uploaded file and add to vector store"""
-    try:
-        # Create uploads directory if it doesn't exist
-        os.makedirs("uploads", exist_ok=True)
-        
-        # Get file extension
-        file_extension = Path(uploaded_file.name).suffix.lower()
-        
-        # Extract text based on file type
-        text_content = None
-        
-        if file_extension == '.txt':
-            # Text file
-            text_content = str(uploaded_file.read(), "utf-8")
-            
-        elif file_extension == '.docx':
-            # Word document
-            text_content = extract_text_from_docx(uploaded_file)
-            
-        elif file_extension == '.pdf':
-            # PDF document
-            text_content = extract_text_from_pdf(uploaded_file)
-            
-        elif file_extension == '.csv':
-            # CSV file
-            text_content = extract_text_from_csv(uploaded_file)
-            
+    # Read CSV - pyarrow's multithreaded parser is much faster on
+    # large/wide files, fall back to pandas when it's unavailable
+    if pa_csv is not None:
+        try:
+            table = pa_csv.read_csv(file)
+        except Exception:
+            file.seek(0)
         else:
-            st.error(f"Unsupported file type: {file_extension}")
-            return False
-        
-        if not text_content or len(text_content.strip()) == 0:
-            st.error("Could not extract text from the file or file is empty")
-            return False
-        
-        # Save the extracted content as a text file
-        file_path = f"uploads/{uploaded_file.name}_processed.txt"
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(text_content)
-        
-        # Process the file
-        document_id = Path(uploaded_file.name).stem
-        success = doc_processor.process_text_file(file_path, document_id)
-        
-        if success:
-            st.success(f"✅ Successfully processed '{uploaded_file.name}'!")
-            st.info(f"📄 Extracted {len(text_content)} characters of text")
-            return True
+            return _csv_text_from_arrow(table, name)
+
+    df = pd.read_csv(file)
+
+    # Convert to text format
+    text = f"CSV Data from {name}:\n\n"
+    text += f"Columns: {', '.join(df.columns)}\n\n"
+    text += f"Total rows: {len(df)}\n\n"
+
+    # Add first few rows as context
+    text += "Sample data:\n"
+    text += df.head(10).to_string(index=False)
+
+    # Add summary statistics if numeric columns exist
+    numeric_cols = df.select_dtypes(include=['number']).columns
+    if len(numeric_cols) > 0:
+        text += "\n\nSummary Statistics:\n"
+        text += df[numeric_cols].describe().to_string()
+
+    return text
+
+def _extract_file(payload):
+    """Extract text from (raw bytes, file name).
+
+    Pure function with no Streamlit calls so it can run in a worker
+    process; raises on unsupported types or extraction errors.
+    """
+    data, name = payload
+    file_extension = os.path.splitext(name)[1].lower()
+
+    if file_extension == '.txt':
+        return data.decode("utf-8")
+    elif file_extension == '.docx':
+        return extract_text_from_docx(BytesIO(data))
+    elif file_extension == '.pdf':
+        return extract_text_from_pdf(BytesIO(data))
+    elif file_extension == '.csv':
+        return extract_text_from_csv(BytesIO(data), name=name)
+    else:
+        raise ValueError(f"Unsupported file type: {file_extension}")
+
+def extract_parallel(uploaded_files, keep_raw=False, progress_callback=None):
+    """Extract a batch of uploaded files across CPU cores.
+
+    Extraction (PDF parsing especially) is CPU-bound and per-file
+    independent, so it scales near-linearly in a process pool.
+    Returns (pairs, ingest_marks) where pairs is a list of
+    (document_id, text_content) and ingest_marks the (hash, name) rows
+    to record once the batch lands in the vector store.
+    """
+    total = len(uploaded_files)
+    pairs = []
+    ingest_marks = []
+    done = 0
+
+    def finish(name, content_hash, text_content):
+        nonlocal done
+        done += 1
+        document_id = Path(name).stem
+        if keep_raw:
+            os.makedirs("uploads", exist_ok=True)
+            with open(f"uploads/{document_id}_processed.txt", 'w', encoding='utf-8') as f:
+                f.write(text_content)
+        st.info(f"📄 Extracted {len(text_content)} characters from '{name}'")
+        pairs.append((document_id, text_content))
+        ingest_marks.append((content_hash, name))
+        if progress_callback:
+            progress_callback(done / total)
+
+    # Skip files whose exact bytes are already in the vector store, and
+    # serve previously extracted (but not ingested) bytes straight from
+    # the content-hash cache; only the rest go to the worker pool
+    pending = []
+    for f in uploaded_files:
+        data = f.getvalue()
+        content_hash = hashlib.sha256(data).hexdigest()
+        if _is_processed(content_hash):
+            done += 1
+            st.info(f"⏭️ Skipping duplicate: {f.name}")
+            if progress_callback:
+                progress_callback(done / total)
+            continue
+        cached = _cached_extraction(content_hash)
+        if cached is not None:
+            finish(f.name, content_hash, cached)
         else:
-            st.error("Failed to process the document")
-            return False
-            
+            pending.append((data, f.name, content_hash))
+
+    if not pending:
+        return pairs, ingest_marks
+
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {
+            executor.submit(_extract_file, (data, name)): (name, content_hash)
+            for data, name, content_hash in pending
+        }
+        for future in as_completed(futures):
+            name, content_hash = futures[future]
+            try:
+                text_content = future.result()
+            except Exception as e:
+                done += 1
+                st.error(f"Error processing {name}: {str(e)}")
+                continue
+
+            if not text_content or len(text_content.strip()) == 0:
+                done += 1
+                st.error(f"Could not extract text from '{name}' or file is empty")
+                continue
+
+            _store_extraction(content_hash, text_content)
+            finish(name, content_hash, text_content)
+
+    return pairs, ingest_marks
+
+def _make_sem_caches(query_engine):
+    """Fresh semantic caches, one per answer mode.
+
+    Rebuilt whenever the corpus changes so stale answers (including
+    ones citing deleted documents) are dropped, and partitioned by
+    use_advanced so one mode never serves the other's answers.
+    """
+    embed = query_engine.vector_store.get_embedding
+    return {False: SemanticQueryCache(embed), True: SemanticQueryCache(embed)}
+
+def batch_ingest(pairs, doc_processor):
+    """Chunk and embed all extracted documents in one batched pass.
+
+    Collects the chunks of every (document_id, text) pair, runs a single
+    batched embedding call, and bulk-adds the vectors to the store so the
+    embedding model does one large forward pass instead of one per file.
+    """
+    all_chunks = []
+    all_metadatas = []
+
+    for document_id, text_content in pairs:
+        chunks = doc_processor.text_splitter.split_text(text_content)
+        for i, chunk in enumerate(chunks):
+            all_metadatas.append({
+                "text": chunk,
+                "document_id": document_id,
+                "chunk_index": i,
+                "source": document_id
+            })
+        all_chunks.extend(chunks)
+
+    if not all_chunks:
+        return False
+
+    try:
+        embeddings = doc_processor.embed_batch(all_chunks, batch_size=64)
+        doc_processor.vector_store.add_documents(all_chunks, all_metadatas, embeddings=embeddings)
+        return True
     except Exception as e:
-        st.error(f"Error processing file: {str(e)}")
+        st.error(f"Error adding documents to vector store: {str(e)}")
         return False
 
 def main():
     st.title("🤖 Company Documents Q&A Assistant")
     st.write("Ask me anything about company policies and procedures!")
     
-    # Initialize components
-    if 'query_engine' not in st.session_state:
-        with st.spinner("Initializing AI models..."):
-            st.session_state.query_engine = QueryEngine()
-    
-    if 'doc_processor' not in st.session_state:
-        with st.spinner("Setting up document processor..."):
-            st.session_state.doc_processor = DocumentProcessor()
+    # Initialize components (cached per process, not per browser session,
+    # so new sessions don't reload the models)
+    with st.spinner("Initializing AI models..."):
+        query_engine = get_query_engine()
+
+    with st.spinner("Setting up document processor..."):
+        doc_processor = get_doc_processor()
+
+    st.session_state.setdefault('stats_version', 0)
+
+    if 'sem_caches' not in st.session_state:
+        # Reuse the query engine's embedding model so we don't load a second one
+        st.session_state.sem_caches = _make_sem_caches(query_engine)
+
+    # Local aliases skip the SessionStateProxy lookup on every access
+    # below (the script reruns on each interaction)
+    sem_caches = st.session_state.sem_caches
+    chat_history = st.session_state.setdefault('chat_history', [])
     
     # Sidebar for document management
     with st.sidebar:
@@ -163,7 +411,9 @@ def main():
         st.subheader("Load Sample Documents")
         if st.button("Load Sample Documents"):
             with st.spinner("Loading sample documents..."):
-                st.session_state.doc_processor.add_sample_documents()
+                doc_processor.add_sample_documents()
+                st.session_state.stats_version += 1
+                sem_caches = st.session_state.sem_caches = _make_sem_caches(query_engine)
                 st.success("Sample documents loaded!")
         
         st.write("---")
@@ -179,43 +429,55 @@ def main():
         
         if uploaded_files:
             st.write(f"**Selected files ({len(uploaded_files)}):**")
-            file_type_icons = {
-                ".pdf": "📑", ".txt": "📄", ".docx": "📝", ".csv": "📊"
-            }
             for file in uploaded_files:
-                ext = Path(file.name).suffix.lower()
-                icon = file_type_icons.get(ext, "📁")
+                ext = os.path.splitext(file.name)[1].lower()
+                icon = FILE_TYPE_ICONS.get(ext, "📁")
                 st.write(f"{icon} {file.name} ({file.size} bytes)")
 
             
+            keep_raw = st.checkbox("💾 Keep raw extracts on disk", help="Save the extracted text to uploads/ in addition to the vector store")
+
             if st.button("🚀 Process All Files"):
                 progress_bar = st.progress(0)
-                success_count = 0
-                
-                for i, uploaded_file in enumerate(uploaded_files):
-                    st.write(f"Processing: {uploaded_file.name}...")
-                    if process_uploaded_file(uploaded_file, st.session_state.doc_processor):
-                        success_count += 1
-                    progress_bar.progress((i + 1) / len(uploaded_files))
-                
-                st.success(f"✅ Successfully processed {success_count}/{len(uploaded_files)} files!")
+
+                # Extract all files in parallel, then embed every chunk
+                # in one batch
+                pairs, ingest_marks = extract_parallel(
+                    uploaded_files,
+                    keep_raw=keep_raw,
+                    progress_callback=progress_bar.progress
+                )
+
+                if pairs and batch_ingest(pairs, doc_processor):
+                    for content_hash, name in ingest_marks:
+                        _mark_processed(content_hash, name)
+                    st.session_state.stats_version += 1
+                    sem_caches = st.session_state.sem_caches = _make_sem_caches(query_engine)
+                    st.success(f"✅ Successfully processed {len(pairs)}/{len(uploaded_files)} files!")
+                elif pairs:
+                    st.error("Failed to process the uploaded files")
+                else:
+                    st.warning("Nothing new to process")
         
         st.write("---")
         
         # Vector store statistics
         st.subheader("📊 Database Stats")
         if st.button("🔄 Refresh Stats"):
-            stats = st.session_state.query_engine.get_vector_store_stats()
+            stats = _stats_snapshot(st.session_state.stats_version)
             st.metric("Total Documents", stats['total_documents'])
             st.metric("Vector Dimension", stats['dimension'])
             # Show live count of uploaded docs
-            st.metric("📂 Uploaded Docs", len(os.listdir("uploads")) if os.path.exists("uploads") else 0)
+            st.metric("📂 Uploaded Docs", len(list_uploads()))
 
         
         # Clear database option
         if st.button("🗑️ Clear All Documents", type="secondary"):
             if st.checkbox("I confirm I want to clear all documents"):
-                st.session_state.doc_processor.clear_all_documents()
+                doc_processor.clear_all_documents()
+                _clear_processed_marks()
+                st.session_state.stats_version += 1
+                sem_caches = st.session_state.sem_caches = _make_sem_caches(query_engine)
                 st.success("All documents cleared!")
         
         st.write("---")
@@ -262,39 +524,40 @@ def main():
         if 'current_question' not in st.session_state:
             st.session_state.current_question = ""
         
-        question = st.text_area(
-            "Type your question here:",
-            value=st.session_state.current_question,
-            placeholder="e.g., What's our vacation policy?",
-            height=100
-        )
+        # The form defers the rerun until submit, so typing in the text
+        # area no longer reruns the whole script per keystroke
+        with st.form("ask_form"):
+            question = st.text_area(
+                "Type your question here:",
+                value=st.session_state.current_question,
+                placeholder="e.g., What's our vacation policy?",
+                height=100
+            )
+            ask_button = st.form_submit_button("🔍 Ask Question", type="primary")
 
         # Clear the current question after displaying
         if st.session_state.current_question:
             st.session_state.current_question = ""
-        
-        col_ask, col_clear = st.columns([3, 1])
-        
-        with col_ask:
-            ask_button = st.button("🔍 Ask Question", type="primary")
-        
-        with col_clear:
-            if st.button("🧹 Clear Chat"):
-                st.session_state.chat_history = []
-                st.success("Chat cleared!")
+
+        if st.button("🧹 Clear Chat"):
+            chat_history.clear()
+            st.success("Chat cleared!")
         
         if ask_button and question:
             with st.spinner("Searching documents and generating answer..."):
                 try:
-                    # Get answer with selected mode
-                    answer = st.session_state.query_engine.ask_question(question, use_advanced)
-                    
-                    # Initialize chat history if it doesn't exist
-                    if 'chat_history' not in st.session_state:
-                        st.session_state.chat_history = []
-                    
+                    # Get answer with selected mode (served from that mode's
+                    # semantic cache when a near-duplicate question was
+                    # already answered); never cache the no-result fallback
+                    # so it stops replaying once documents are uploaded
+                    answer = sem_caches[use_advanced].get_or_compute(
+                        question,
+                        lambda: query_engine.ask_question(question, use_advanced),
+                        cache_if=lambda a: a != NO_CONFIDENT_ANSWER
+                    )
+
                     # Add to chat history
-                    st.session_state.chat_history.append({
+                    chat_history.append({
                         'question': question,
                         'answer': answer
                     })
@@ -303,15 +566,15 @@ def main():
                     st.error(f"Error generating answer: {str(e)}")
         
         # Display chat history
-        if 'chat_history' in st.session_state and st.session_state.chat_history:
+        if chat_history:
             st.header("💭 Chat History")
-            for chat in reversed(st.session_state.chat_history):
-                st.markdown(f"""
-                <div style='background-color:#f4f4f4; padding:15px; border-radius:10px; margin-bottom:10px'>
-                    <strong>👤 You:</strong> {chat['question']}  
-                    <br/><strong>🤖 Assistant:</strong> {chat['answer']}
-                </div>
-                """, unsafe_allow_html=True)
+            # Native chat widgets render much faster than per-message
+            # unsafe HTML through the markdown sanitizer
+            for chat in reversed(chat_history):
+                with st.chat_message("user"):
+                    st.write(chat['question'])
+                with st.chat_message("assistant"):
+                    st.write(chat['answer'])
 
     
     with col2:
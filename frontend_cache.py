@@ -0,0 +1,120 @@
+import time
+import numpy as np
+
+# L2-normalized components lie in [-1, 1], so scaling by 127 uses the
+# full int8 range
+QUANT_SCALE = 127
+
+class SemanticQueryCache:
+    """Semantic cache for question answering.
+
+    Stores the embedding of every answered question int8-quantized in a
+    contiguous matrix so a lookup is a single integer matrix-vector
+    product at a quarter of the float32 memory. Questions whose cosine
+    similarity to a cached question exceeds the threshold are served
+    from the cache instead of re-running retrieval and generation.
+    """
+
+    def __init__(self, embed_fn, threshold=0.95, max_entries=1024, ttl_seconds=7 * 24 * 3600):
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.embeddings = None  # (N, d) int8, quantized from L2-normalized rows
+        self.answers = []
+        self.timestamps = []
+        self.last_used = []
+
+        self.hits = 0
+        self.misses = 0
+
+    def _embed(self, question):
+        """Embed and L2-normalize a question"""
+        embedding = np.asarray(self.embed_fn(question), dtype=np.float32).ravel()
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            embedding = embedding / norm
+        return embedding
+
+    @staticmethod
+    def _quantize(embedding):
+        """Quantize an L2-normalized embedding to int8"""
+        return np.clip(np.round(embedding * QUANT_SCALE), -127, 127).astype(np.int8)
+
+    def _prune_expired(self):
+        """Drop entries older than the TTL"""
+        if self.embeddings is None:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        keep = [i for i, ts in enumerate(self.timestamps) if ts >= cutoff]
+        if len(keep) == len(self.timestamps):
+            return
+        self._keep_rows(keep)
+
+    def _keep_rows(self, keep):
+        """Rebuild internal storage keeping only the given row indices"""
+        if not keep:
+            self.embeddings = None
+            self.answers = []
+            self.timestamps = []
+            self.last_used = []
+            return
+        self.embeddings = np.ascontiguousarray(self.embeddings[keep])
+        self.answers = [self.answers[i] for i in keep]
+        self.timestamps = [self.timestamps[i] for i in keep]
+        self.last_used = [self.last_used[i] for i in keep]
+
+    def lookup(self, query_embedding):
+        """Return a cached answer for the embedded question, or None"""
+        if self.embeddings is None or len(self.answers) == 0:
+            return None
+
+        # Integer matvec over all cached embeddings, rescaled back to an
+        # approximate cosine. int32 accumulators: a 384-dim dot of 127²
+        # products overflows int16.
+        sims = (
+            self.embeddings.astype(np.int32) @ query_embedding.astype(np.int32)
+        ) * (1.0 / QUANT_SCALE ** 2)
+        best = int(sims.argmax())
+        if sims[best] >= self.threshold:
+            self.last_used[best] = time.time()
+            return self.answers[best]
+        return None
+
+    def insert(self, query_embedding, answer):
+        """Add an answered question to the cache"""
+        now = time.time()
+        row = query_embedding.reshape(1, -1)
+        if self.embeddings is None:
+            self.embeddings = np.ascontiguousarray(row)
+        else:
+            self.embeddings = np.ascontiguousarray(np.vstack([self.embeddings, row]))
+        self.answers.append(answer)
+        self.timestamps.append(now)
+        self.last_used.append(now)
+
+        # LRU eviction once over capacity
+        if len(self.answers) > self.max_entries:
+            order = sorted(range(len(self.last_used)), key=lambda i: self.last_used[i])
+            self._keep_rows(sorted(order[1:]))
+
+    def get_or_compute(self, question, compute_fn, cache_if=None):
+        """Return a cached answer or compute, cache and return a fresh one.
+
+        `cache_if(answer)` can veto caching, e.g. for no-result
+        fallbacks that shouldn't be replayed once documents arrive.
+        """
+        self._prune_expired()
+
+        query_embedding = self._quantize(self._embed(question))
+        cached = self.lookup(query_embedding)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        answer = compute_fn()
+        if cache_if is None or cache_if(answer):
+            self.insert(query_embedding, answer)
+        return answer
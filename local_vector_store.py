@@ -2,14 +2,20 @@ import faiss
 import numpy as np
 import pickle
 import os
+import threading
 from sentence_transformers import SentenceTransformer
 
 class LocalVectorStore:
-    def __init__(self, dimension=768, store_path="vector_store"):
+    def __init__(self, dimension=384, store_path="vector_store"):
         self.dimension = dimension
         self.store_path = store_path
-        #self.embeddings_model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.embeddings_model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
+        # The store can be shared across Streamlit sessions/threads, so
+        # serialize index mutations and searches
+        self._lock = threading.Lock()
+        # MiniLM at 384d encodes ~2x faster than mpnet-base at 768d and
+        # halves the index size, at a small accuracy cost
+        self.embeddings_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        #self.embeddings_model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
         
         # Create storage directory
         os.makedirs(store_path, exist_ok=True)
@@ -21,10 +27,19 @@ class LocalVectorStore:
         if os.path.exists(self.index_file) and os.path.exists(self.metadata_file):
             self.load_index()
         else:
-            self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
+            self.index = self._new_index()
             self.texts = []
             self.metadata = []
-    
+
+    def _new_index(self):
+        """Create an empty HNSW index (inner product == cosine on normalized vectors)"""
+        # HNSW gives O(log N) approximate search instead of the O(N·d)
+        # scan a flat index does on every query
+        index = faiss.IndexHNSWFlat(self.dimension, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 200
+        index.hnsw.efSearch = 64
+        return index
+
     def get_embedding(self, text):
         """Generate embedding using HuggingFace model"""
         embedding = self.embeddings_model.encode(text)
@@ -40,23 +55,28 @@ class LocalVectorStore:
                 embedding = self.get_embedding(text)
                 embeddings.append(embedding)
 
-        embeddings = np.array(embeddings).astype('float32')
+        # One contiguous float32 matrix so the batch goes into the index
+        # with a single add (one internal grow + memcpy) instead of
+        # per-vector insertions; asarray avoids a copy when the caller
+        # already passed float32
+        embeddings = np.ascontiguousarray(np.asarray(embeddings, dtype='float32'))
 
         # Normalize for cosine similarity
         faiss.normalize_L2(embeddings)
 
-        # Add to index
-        try:
-            self.index.add(embeddings)
-        except Exception as e:
-            print(f"Error adding to index: {str(e)}")
-            return  # Exit if adding to index fails
+        with self._lock:
+            # Add to index
+            try:
+                self.index.add(embeddings)
+            except Exception as e:
+                print(f"Error adding to index: {str(e)}")
+                return  # Exit if adding to index fails
 
-        self.texts.extend(texts)
-        self.metadata.extend(metadatas)
+            self.texts.extend(texts)
+            self.metadata.extend(metadatas)
 
-        # Save automatically
-        self.save_index()
+            # Save automatically
+            self.save_index()
         print(f"✅ Successfully added documents. Total documents: {len(self.texts)}")
 
     
@@ -69,7 +89,8 @@ class LocalVectorStore:
         query_embedding = np.array([query_embedding]).astype('float32')
         faiss.normalize_L2(query_embedding)
         
-        scores, indices = self.index.search(query_embedding, min(k, len(self.texts)))
+        with self._lock:
+            scores, indices = self.index.search(query_embedding, min(k, len(self.texts)))
         
         results = []
         for score, idx in zip(scores[0], indices[0]):
@@ -83,14 +104,22 @@ class LocalVectorStore:
         return results
     
     def save_index(self):
-        """Save the vector store"""
-        faiss.write_index(self.index, self.index_file)
-        with open(self.metadata_file, 'wb') as f:
+        """Save the vector store (atomic write-then-rename)"""
+        faiss.write_index(self.index, self.index_file + ".tmp")
+        os.replace(self.index_file + ".tmp", self.index_file)
+        with open(self.metadata_file + ".tmp", 'wb') as f:
             pickle.dump({'texts': self.texts, 'metadata': self.metadata}, f)
-    
+        os.replace(self.metadata_file + ".tmp", self.metadata_file)
+
     def load_index(self):
         """Load the vector store"""
-        self.index = faiss.read_index(self.index_file)
+        try:
+            # mmap the index so startup pages it in lazily and multiple
+            # processes can share the pages
+            self.index = faiss.read_index(self.index_file, faiss.IO_FLAG_MMAP)
+        except Exception:
+            # Not every index type supports mmap'd reads
+            self.index = faiss.read_index(self.index_file)
         with open(self.metadata_file, 'rb') as f:
             data = pickle.load(f)
             self.texts = data['texts']
@@ -99,10 +128,11 @@ class LocalVectorStore:
     
     def clear(self):
         """Clear all documents"""
-        self.index = faiss.IndexFlatIP(self.dimension)
-        self.texts = []
-        self.metadata = []
-        self.save_index()
+        with self._lock:
+            self.index = self._new_index()
+            self.texts = []
+            self.metadata = []
+            self.save_index()
         print("Vector store cleared")
     
     def get_stats(self):
@@ -6,11 +6,16 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Fallback when retrieval finds nothing; callers can compare against it
+# to avoid caching a transient failure
+NO_CONFIDENT_ANSWER = "⚠️ Sorry, I couldn't find a confident answer to your question. Try rephrasing or check if the document is loaded."
+
 class QueryEngine:
-    def __init__(self):
-        # Initialize local vector store
+    def __init__(self, vector_store=None):
+        # Use the shared vector store when given one so searches see
+        # documents ingested elsewhere in the process
         print("Loading vector store for search...")
-        self.vector_store = LocalVectorStore()
+        self.vector_store = vector_store if vector_store is not None else LocalVectorStore()
         
         # Initialize text generation model (runs locally!)
         print("Loading text generation model...")
@@ -172,7 +177,7 @@ class QueryEngine:
         print(f"Found {len(relevant_chunks)} relevant chunks")
 
         if not relevant_chunks:
-            return "⚠️ Sorry, I couldn't find a confident answer to your question. Try rephrasing or check if the document is loaded."
+            return NO_CONFIDENT_ANSWER
 
         # Warn if low match score
         if relevant_chunks[0]['score'] < 0.45: